@@ -0,0 +1,509 @@
+"""
+職缺市場分析
+
+以向量化的 group-by 計算職缺市場的彙總統計，並將中間結果（rollup）
+保存在磁碟上，每次爬取後只需將新職缺累加進去，不必重新掃描全部資料：
+
+- 依地區、產業、經歷、學歷分組的薪資百分位數（以薪資直方圖累加，可增量更新；
+  月薪、年薪、日薪、時薪分開統計）
+- 各分組的職缺數量
+- 技能需求出現次數（來自以逗號分隔的 required_skills）
+- 福利標籤普及率（來自以逗號分隔的 welfare_tags）
+
+每個 job_id 只會被計入一次，重複爬取同一職缺不會重複計算。產業只出現在
+詳細資訊中，因此產業維度會在該職缺的詳細資訊第一次計入時才歸類。
+
+rollup 以版本為單位保存：各資料表先寫成帶版本號的檔案，最後才更新
+manifest.json，讀取端只會看到完整寫入的版本。更新時以鎖定檔案序列化
+「載入、累加、保存」的過程，多個同時寫入的程序不會互相覆蓋。
+"""
+
+import glob
+import json
+import logging
+import os
+import time
+from contextlib import contextmanager
+
+import pandas as pd
+
+logger = logging.getLogger(__name__)
+
+# 各薪資單位的直方圖分組寬度（元），百分位數以分組中點近似
+SALARY_BIN_WIDTHS = {"月薪": 1000, "年薪": 10000, "日薪": 100, "時薪": 10}
+DEFAULT_SALARY_UNIT = "月薪"
+# 104 以 9999999 表示「以上」，0 表示面議，兩者都不列入薪資統計
+SALARY_UPPER_BOUND = 9999999
+SALARY_FIELDS = ["salary_low", "salary_high"]
+DIMENSIONS = ["area", "industry", "experience", "education"]
+# 可由基本資訊取得的維度；industry 需要詳細資訊
+LISTING_DIMENSIONS = ["area", "experience", "education"]
+PERCENTILES = [0.25, 0.5, 0.75]
+MANIFEST_FILE = "manifest.json"
+LOCK_FILE = ".lock"
+# 等待鎖定的最長秒數，以及視為前一個程序異常結束而遺留的鎖定檔案存在秒數
+LOCK_TIMEOUT = 120
+LOCK_STALE_AFTER = 600
+
+ROLLUP_TABLES = {
+    "salary_histogram": {
+        "dimension": "object",
+        "group": "object",
+        "salary_field": "object",
+        "salary_unit": "object",
+        "salary_bin": "int64",
+        "count": "int64",
+    },
+    "posting_counts": {"dimension": "object", "group": "object", "count": "int64"},
+    "skill_counts": {"skill": "object", "count": "int64"},
+    "welfare_counts": {"welfare_tag": "object", "count": "int64"},
+    # 保存薪資，讓之後才取得詳細資訊的職缺也能計入產業薪資統計
+    "seen_jobs": {
+        "job_id": "object",
+        "salary_unit": "object",
+        "salary_low": "int64",
+        "salary_high": "int64",
+    },
+    "seen_details": {"job_id": "object"},
+}
+
+
+def _empty_table(name):
+    """
+    建立具有正確欄位型別的空 rollup 資料表
+
+    :param name: 資料表名稱
+    :return: 空的 DataFrame
+    """
+    return pd.DataFrame(
+        {col: pd.Series(dtype=dtype) for col, dtype in ROLLUP_TABLES[name].items()}
+    )
+
+
+def read_cache_version(cache_dir):
+    """
+    讀取快取目錄中目前的 rollup 版本
+
+    :param cache_dir: rollup 快取目錄
+    :return: 版本字串，若快取不存在則為 None
+    """
+    path = os.path.join(cache_dir, MANIFEST_FILE)
+    if not os.path.exists(path):
+        return None
+    with open(path, encoding="utf-8") as f:
+        return json.load(f)["version"]
+
+
+@contextmanager
+def cache_lock(cache_dir):
+    """
+    以鎖定檔案取得 rollup 快取目錄的獨占存取權
+
+    :param cache_dir: rollup 快取目錄
+    :raises TimeoutError: 超過 LOCK_TIMEOUT 秒仍無法取得鎖定時
+    """
+    os.makedirs(cache_dir, exist_ok=True)
+    path = os.path.join(cache_dir, LOCK_FILE)
+    deadline = time.monotonic() + LOCK_TIMEOUT
+    while True:
+        try:
+            os.close(os.open(path, os.O_CREAT | os.O_EXCL | os.O_WRONLY))
+            break
+        except FileExistsError:
+            try:
+                stale = time.time() - os.path.getmtime(path) > LOCK_STALE_AFTER
+            except FileNotFoundError:
+                continue
+            if stale:
+                logger.warning(f"移除遺留的市場統計鎖定檔案 {path}")
+                os.remove(path)
+                continue
+            if time.monotonic() > deadline:
+                raise TimeoutError(f"無法取得市場統計快取的鎖定: {path}")
+            time.sleep(0.1)
+    try:
+        yield
+    finally:
+        os.remove(path)
+
+
+def salary_units(descriptions):
+    """
+    由薪資描述判斷薪資單位
+
+    「待遇面議」的職缺若有列出薪資，依 104 的規定為經常性月薪；
+    論件計酬等無法換算的薪資單位為空值，不列入薪資統計。
+
+    :param descriptions: salary_description Series，例如「月薪40,000~60,000元」
+    :return: 薪資單位 Series（月薪、年薪、日薪、時薪或空值）
+    """
+    descriptions = descriptions.astype(str)
+    units = descriptions.str.extract(f"^({'|'.join(SALARY_BIN_WIDTHS)})")[0]
+    return units.mask(descriptions.str.startswith("待遇面議"), DEFAULT_SALARY_UNIT)
+
+
+def prepare_dimension_frame(jobs_df):
+    """
+    整理出每個職缺在基本資訊中的分析維度與薪資欄位
+
+    :param jobs_df: 包含基本職缺信息的 DataFrame
+    :return: 含 job_id、各分析維度與薪資欄位的 DataFrame
+    """
+    return pd.DataFrame(
+        {
+            "job_id": jobs_df["job_id"],
+            # company_address 以「縣市 + 區」開頭，例如「台北市信義區 ...」
+            "area": jobs_df["company_address"].astype(str).str[:3],
+            "experience": jobs_df["experience_required"],
+            "education": jobs_df["required_education"],
+            "salary_unit": salary_units(jobs_df["salary_description"]),
+            "salary_low": jobs_df["salary_low"],
+            "salary_high": jobs_df["salary_high"],
+        }
+    )
+
+
+def split_tags(series):
+    """
+    將以逗號分隔的字串欄位展開為單一標籤的 Series
+
+    :param series: 以 ", " 分隔的字串 Series
+    :return: 去除空白值後的標籤 Series
+    """
+    tags = series.dropna().astype(str).str.split(",").explode().str.strip()
+    return tags[tags != ""]
+
+
+def _add_counts(current, new, keys):
+    """
+    將新的計數累加到既有的計數表
+
+    :param current: 既有的計數 DataFrame
+    :param new: 新的計數 DataFrame
+    :param keys: 分組欄位列表
+    :return: 累加後的計數 DataFrame
+    """
+    if new.empty:
+        return current
+    combined = pd.concat([current, new], ignore_index=True)
+    return combined.groupby(keys, as_index=False)["count"].sum()
+
+
+class MarketRollups:
+    """
+    職缺市場彙總統計類別
+
+    負責增量更新並保存 rollup 資料表，以及由 rollup 計算市場統計。
+    """
+
+    def __init__(self, cache_dir, version=None):
+        """
+        初始化 MarketRollups 實例，若快取目錄中已有 rollup 則一併載入
+
+        :param cache_dir: rollup 快取目錄
+        :param version: 要載入的版本，預設為 manifest 中的目前版本
+        """
+        self.cache_dir = cache_dir
+        self._load(version or read_cache_version(cache_dir))
+
+    def _load(self, version):
+        """
+        載入指定版本的 rollup 資料表
+
+        :param version: 版本字串，None 表示尚無 rollup
+        """
+        self.version = version
+        self.tables = {}
+        for name in ROLLUP_TABLES:
+            self.tables[name] = (
+                pd.read_parquet(self._table_path(name, version))
+                if version
+                else _empty_table(name)
+            )
+
+    def _table_path(self, name, version):
+        return os.path.join(self.cache_dir, f"{name}-{version}.parquet")
+
+    @property
+    def job_count(self):
+        """已計入統計的職缺數量"""
+        return len(self.tables["seen_jobs"])
+
+    @property
+    def detail_count(self):
+        """已計入統計的詳細資訊數量"""
+        return len(self.tables["seen_details"])
+
+    def update(self, jobs_df, jobs_details_df=None):
+        """
+        將新爬取的職缺累加到 rollup 並保存為新版本
+
+        整個過程持有快取目錄的鎖定；若其他程序在此實例載入後已保存新版本，
+        會先重新載入最新版本再累加，不會覆蓋其他程序的結果。
+
+        :param jobs_df: 包含基本職缺信息的 DataFrame
+        :param jobs_details_df: 包含詳細職缺信息的 DataFrame，預設為 None
+        :return: 新計入的職缺數量、新計入的詳細資訊數量
+        """
+        with cache_lock(self.cache_dir):
+            current_version = read_cache_version(self.cache_dir)
+            if current_version != self.version:
+                self._load(current_version)
+            new_jobs, new_details = self._accumulate(jobs_df, jobs_details_df)
+            self._write_version()
+        logger.info(f"市場統計已更新：新增 {new_jobs} 筆職缺、{new_details} 筆詳細資訊")
+        return new_jobs, new_details
+
+    def _accumulate(self, jobs_df, jobs_details_df):
+        """
+        將尚未計入的職缺與詳細資訊累加到記憶體中的 rollup 資料表
+
+        :param jobs_df: 包含基本職缺信息的 DataFrame
+        :param jobs_details_df: 包含詳細職缺信息的 DataFrame，可為 None
+        :return: 新計入的職缺數量、新計入的詳細資訊數量
+        """
+        new_jobs = jobs_df[~jobs_df["job_id"].isin(self.tables["seen_jobs"]["job_id"])]
+        new_jobs = new_jobs.drop_duplicates(subset="job_id")
+        if not new_jobs.empty:
+            self._update_job_rollups(prepare_dimension_frame(new_jobs))
+
+        new_details = _empty_table("seen_details")
+        if jobs_details_df is not None and not jobs_details_df.empty:
+            new_details = jobs_details_df[
+                ~jobs_details_df["job_id"].isin(self.tables["seen_details"]["job_id"])
+            ].drop_duplicates(subset="job_id")
+            if not new_details.empty:
+                self._update_detail_rollups(new_details)
+        return len(new_jobs), len(new_details)
+
+    def _update_job_rollups(self, frame):
+        """
+        累加基本資訊維度的職缺數量與薪資直方圖，並記錄職缺薪資
+
+        :param frame: prepare_dimension_frame 產生的 DataFrame
+        """
+        self._add_dimension_rollups(frame, LISTING_DIMENSIONS)
+        seen = frame[["job_id", "salary_unit"] + SALARY_FIELDS].copy()
+        for field in SALARY_FIELDS:
+            seen[field] = (
+                pd.to_numeric(seen[field], errors="coerce").fillna(0).astype("int64")
+            )
+        self.tables["seen_jobs"] = pd.concat(
+            [self.tables["seen_jobs"], seen], ignore_index=True
+        )
+
+    def _add_dimension_rollups(self, frame, dimensions):
+        """
+        依指定維度累加職缺數量與薪資直方圖
+
+        :param frame: 含 job_id、薪資欄位與各維度欄位的 DataFrame
+        :param dimensions: 要累加的維度列表
+        """
+        by_dimension = frame.melt(
+            id_vars=["job_id", "salary_unit"] + SALARY_FIELDS,
+            value_vars=dimensions,
+            var_name="dimension",
+            value_name="group",
+        )
+        by_dimension = by_dimension[
+            by_dimension["group"].notna() & (by_dimension["group"].astype(str) != "")
+        ]
+        by_dimension["group"] = by_dimension["group"].astype(str)
+
+        posting_counts = (
+            by_dimension.groupby(["dimension", "group"])
+            .size()
+            .reset_index(name="count")
+        )
+
+        salaries = by_dimension.melt(
+            id_vars=["dimension", "group", "salary_unit"],
+            value_vars=SALARY_FIELDS,
+            var_name="salary_field",
+            value_name="salary",
+        )
+        salaries["salary"] = pd.to_numeric(salaries["salary"], errors="coerce")
+        salaries = salaries[
+            salaries["salary_unit"].isin(list(SALARY_BIN_WIDTHS))
+            & (salaries["salary"] > 0)
+            & (salaries["salary"] < SALARY_UPPER_BOUND)
+        ]
+        bin_width = salaries["salary_unit"].map(SALARY_BIN_WIDTHS)
+        salaries["salary_bin"] = (salaries["salary"] // bin_width * bin_width).astype(
+            "int64"
+        )
+        salary_histogram = (
+            salaries.groupby(
+                ["dimension", "group", "salary_field", "salary_unit", "salary_bin"]
+            )
+            .size()
+            .reset_index(name="count")
+        )
+
+        self.tables["posting_counts"] = _add_counts(
+            self.tables["posting_counts"], posting_counts, ["dimension", "group"]
+        )
+        self.tables["salary_histogram"] = _add_counts(
+            self.tables["salary_histogram"],
+            salary_histogram,
+            ["dimension", "group", "salary_field", "salary_unit", "salary_bin"],
+        )
+
+    def _update_detail_rollups(self, details):
+        """
+        累加產業維度、技能與福利標籤出現次數
+
+        產業維度的薪資取自 seen_jobs，因此基本資訊與詳細資訊在不同次爬取中
+        取得時也能正確歸類；尚未有基本資訊的職缺不列入產業統計。
+
+        :param details: 尚未計入的詳細職缺信息 DataFrame
+        """
+        if "industry" in details.columns:
+            industry = details[["job_id", "industry"]].merge(
+                self.tables["seen_jobs"], on="job_id"
+            )
+            if not industry.empty:
+                self._add_dimension_rollups(industry, ["industry"])
+        if "required_skills" in details.columns:
+            skill_counts = (
+                split_tags(details["required_skills"])
+                .value_counts()
+                .rename_axis("skill")
+                .reset_index(name="count")
+            )
+            self.tables["skill_counts"] = _add_counts(
+                self.tables["skill_counts"], skill_counts, ["skill"]
+            )
+        if "welfare_tags" in details.columns:
+            # 同一職缺重複的標籤只計算一次，以便換算普及率
+            welfare_tags = split_tags(details["welfare_tags"].reset_index(drop=True))
+            welfare_counts = (
+                welfare_tags.reset_index()
+                .drop_duplicates()["welfare_tags"]
+                .value_counts()
+                .rename_axis("welfare_tag")
+                .reset_index(name="count")
+            )
+            self.tables["welfare_counts"] = _add_counts(
+                self.tables["welfare_counts"], welfare_counts, ["welfare_tag"]
+            )
+        self.tables["seen_details"] = pd.concat(
+            [self.tables["seen_details"], details[["job_id"]]], ignore_index=True
+        )
+
+    def save(self):
+        """
+        在鎖定下將記憶體中的 rollup 資料表保存為新版本
+
+        會取代其他程序在此實例載入後保存的版本；累加新職缺請使用 update()。
+        """
+        with cache_lock(self.cache_dir):
+            self._write_version()
+
+    def _write_version(self):
+        """
+        將 rollup 資料表寫成新版本，呼叫端須持有快取目錄的鎖定
+
+        先寫入帶版本號的資料表檔案，再以原子性的 rename 更新 manifest.json；
+        保留前一個版本與 manifest 中原本的版本，讓正在讀取的頁面不會讀到
+        被刪除的檔案。
+        """
+        os.makedirs(self.cache_dir, exist_ok=True)
+        version = str(time.time_ns())
+        for name, table in self.tables.items():
+            table.to_parquet(self._table_path(name, version), index=False)
+
+        manifest_path = os.path.join(self.cache_dir, MANIFEST_FILE)
+        published_version = read_cache_version(self.cache_dir)
+        temp_path = f"{manifest_path}.tmp"
+        with open(temp_path, "w", encoding="utf-8") as f:
+            json.dump({"version": version}, f)
+        os.replace(temp_path, manifest_path)
+
+        keep = {version, self.version, published_version}
+        for name in ROLLUP_TABLES:
+            for path in glob.glob(os.path.join(self.cache_dir, f"{name}-*.parquet")):
+                file_version = os.path.basename(path)[len(name) + 1 : -len(".parquet")]
+                if file_version not in keep:
+                    os.remove(path)
+        self.version = version
+
+    def salary_percentiles(
+        self, dimension, salary_field="salary_low", salary_unit=DEFAULT_SALARY_UNIT
+    ):
+        """
+        由薪資直方圖計算指定維度各分組的薪資百分位數
+
+        :param dimension: 分析維度（area、industry、experience、education）
+        :param salary_field: 薪資欄位（salary_low 或 salary_high），預設為 salary_low
+        :param salary_unit: 薪資單位（月薪、年薪、日薪、時薪），預設為月薪
+        :return: 以分組為索引，含樣本數與各百分位數的 DataFrame
+        """
+        histogram = self.tables["salary_histogram"]
+        histogram = histogram[
+            (histogram["dimension"] == dimension)
+            & (histogram["salary_field"] == salary_field)
+            & (histogram["salary_unit"] == salary_unit)
+        ].sort_values(["group", "salary_bin"])
+        if histogram.empty:
+            return pd.DataFrame(
+                columns=["count"] + [f"p{int(p * 100)}" for p in PERCENTILES]
+            )
+
+        histogram = histogram.assign(
+            cumulative=histogram.groupby("group")["count"].cumsum(),
+            total=histogram.groupby("group")["count"].transform("sum"),
+        )
+        result = histogram.groupby("group")["total"].first().rename("count").to_frame()
+        for p in PERCENTILES:
+            reached = histogram[histogram["cumulative"] >= p * histogram["total"]]
+            result[f"p{int(p * 100)}"] = (
+                reached.groupby("group")["salary_bin"].first()
+                + SALARY_BIN_WIDTHS[salary_unit] // 2
+            )
+        return result.sort_values("count", ascending=False)
+
+    def posting_counts(self, dimension):
+        """
+        查詢指定維度各分組的職缺數量
+
+        :param dimension: 分析維度（area、industry、experience、education）
+        :return: 以分組為索引、依數量遞減排序的 Series
+        """
+        counts = self.tables["posting_counts"]
+        counts = counts[counts["dimension"] == dimension]
+        return (
+            counts.set_index("group")["count"]
+            .astype("int64")
+            .sort_values(ascending=False)
+        )
+
+    def skill_frequency(self, top_n=None):
+        """
+        查詢技能需求出現次數
+
+        :param top_n: 只回傳前 N 項，預設為全部
+        :return: 以技能為索引、依次數遞減排序的 Series
+        """
+        counts = (
+            self.tables["skill_counts"]
+            .set_index("skill")["count"]
+            .astype("int64")
+            .sort_values(ascending=False)
+        )
+        return counts.head(top_n) if top_n else counts
+
+    def welfare_prevalence(self):
+        """
+        查詢福利標籤普及率（有該標籤的職缺數 / 已計入的詳細資訊數）
+
+        :return: 以福利標籤為索引、依普及率遞減排序的 Series
+        """
+        counts = (
+            self.tables["welfare_counts"]
+            .set_index("welfare_tag")["count"]
+            .astype("int64")
+        )
+        if not self.detail_count:
+            return counts.astype(float)
+        return (counts / self.detail_count).sort_values(ascending=False)
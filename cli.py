@@ -0,0 +1,298 @@
+"""
+104 人力銀行職缺搜尋命令列工具
+
+以命令列參數或 JSON 設定檔指定搜索條件，並將轉換後的職缺資料以 JSONL
+格式（每行一筆 JSON）邊抓取邊串流輸出到標準輸出或檔案，方便排程與管線處理。
+
+使用範例：
+    python cli.py "Python 工程師" "資料工程師" -n 200 --sort date \\
+        --filter area=6001001000 --filter ro=1 > jobs.jsonl
+    python cli.py --config crawl.json --details -o details.jsonl
+
+設定檔格式（JSON，所有欄位皆為選填，命令列參數優先）：
+    {
+        "queries": ["Python 工程師"],
+        "max_results": 100,
+        "sort_by": "date",
+        "ascending": false,
+        "filters": {"area": "6001001000", "ro": "1"},
+        "details": false,
+        "output": "jobs.jsonl"
+    }
+
+為了縮短啟動時間，本模組只匯入標準函式庫，爬取相關模組在解析參數後才載入。
+"""
+
+import argparse
+import asyncio
+import json
+import logging
+import os
+import sys
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_CONFIG = {
+    "queries": [],
+    "max_results": 100,
+    "sort_by": "relevance",
+    "ascending": False,
+    "filters": {},
+    "details": False,
+    "output": "-",
+}
+
+SORT_CHOICES = ["relevance", "experience", "education", "applicants", "salary", "date"]
+
+
+def parse_filter(value):
+    """
+    解析 key=value 格式的篩選參數
+
+    :param value: 命令列傳入的字串
+    :return: (key, value) 元組
+    """
+    key, separator, filter_value = value.partition("=")
+    if not separator or not key:
+        raise argparse.ArgumentTypeError(f"篩選參數格式應為 key=value: {value}")
+    return key, filter_value
+
+
+def build_argument_parser():
+    """
+    建立命令列參數解析器
+
+    :return: argparse.ArgumentParser 實例
+    """
+    parser = argparse.ArgumentParser(
+        description="搜尋 104 人力銀行職缺，並以 JSONL 格式串流輸出結果"
+    )
+    parser.add_argument("queries", nargs="*", help="搜索關鍵字，可指定多個")
+    parser.add_argument("-c", "--config", help="JSON 設定檔路徑")
+    parser.add_argument(
+        "-n", "--max-results", type=int, help="每個關鍵字的最大結果數量，預設為 100"
+    )
+    parser.add_argument("--sort", choices=SORT_CHOICES, help="排序方式")
+    parser.add_argument(
+        "--asc", action="store_const", const=True, default=None, help="升序排序"
+    )
+    parser.add_argument(
+        "-f",
+        "--filter",
+        action="append",
+        type=parse_filter,
+        default=[],
+        metavar="KEY=VALUE",
+        help="篩選參數，例如 area=6001001000，可重複指定",
+    )
+    parser.add_argument(
+        "--details",
+        action="store_const",
+        const=True,
+        default=None,
+        help="輸出職缺詳細資訊而非基本資訊",
+    )
+    parser.add_argument("-o", "--output", help="輸出檔案路徑，'-' 表示標準輸出")
+    parser.add_argument(
+        "-q", "--quiet", action="store_true", help="只在標準錯誤輸出顯示警告與錯誤"
+    )
+    return parser
+
+
+def load_config(args):
+    """
+    合併預設值、設定檔與命令列參數
+
+    :param args: argparse 解析結果
+    :return: 設定字典
+    :raises ValueError: 設定檔內容格式不正確時
+    """
+    config = dict(DEFAULT_CONFIG)
+    if args.config:
+        with open(args.config, encoding="utf-8") as f:
+            file_config = json.load(f)
+        if not isinstance(file_config, dict):
+            raise ValueError("設定檔的最上層必須是 JSON 物件")
+        unknown_keys = sorted(set(file_config) - set(DEFAULT_CONFIG))
+        if unknown_keys:
+            raise ValueError(f"未知的設定項目: {', '.join(unknown_keys)}")
+        config.update(file_config)
+
+    if isinstance(config["queries"], str):
+        config["queries"] = [config["queries"]]
+    if not isinstance(config["queries"], list) or not all(
+        isinstance(query, str) for query in config["queries"]
+    ):
+        raise ValueError("queries 必須是字串或字串列表")
+    if not isinstance(config["filters"], dict):
+        raise ValueError("filters 必須是 JSON 物件")
+    # bool 是 int 的子類別，需另外排除
+    if (
+        not isinstance(config["max_results"], int)
+        or isinstance(config["max_results"], bool)
+        or config["max_results"] < 1
+    ):
+        raise ValueError("max_results 必須是正整數")
+    for key in ("ascending", "details"):
+        if not isinstance(config[key], bool):
+            raise ValueError(f"{key} 必須是 true 或 false")
+    if config["sort_by"] not in SORT_CHOICES:
+        raise ValueError(f"sort_by 必須是 {', '.join(SORT_CHOICES)} 其中之一")
+    if not isinstance(config["output"], str):
+        raise ValueError("output 必須是檔案路徑字串")
+    config["filters"] = dict(config["filters"])
+
+    if args.queries:
+        config["queries"] = args.queries
+    if args.max_results is not None:
+        config["max_results"] = args.max_results
+    if args.sort is not None:
+        config["sort_by"] = args.sort
+    if args.asc is not None:
+        config["ascending"] = args.asc
+    if args.details is not None:
+        config["details"] = args.details
+    if args.output is not None:
+        config["output"] = args.output
+    config["filters"].update(args.filter)
+    return config
+
+
+async def stream_jobs(job_searcher, write_row, fetch_details=False):
+    """
+    搜索職缺，並在每筆資料抵達時立即轉換並輸出
+
+    :param job_searcher: JobSearcher 實例
+    :param write_row: 輸出單筆資料的函數
+    :param fetch_details: 是否輸出詳細資訊，預設為 False
+    :return: 輸出的職缺數量
+    """
+    import aiohttp
+    from main import JobTransformer
+
+    search_query = job_searcher.build_search_query()
+    emitted = 0
+
+    async def fetch_and_write_details(session, job_id):
+        job_info, error = await job_searcher.fetch_job_details(session, job_id)
+        if job_info:
+            row = JobTransformer.transform_job_detail_data(job_info)
+            row["search_query"] = job_searcher.keyword
+            write_row(row)
+        elif error:
+            logger.error(f"獲取職缺詳細資訊時發生錯誤: {error}")
+
+    async with aiohttp.ClientSession() as session:
+        detail_tasks = []
+        pages = job_searcher.iter_search_pages(session, search_query)
+        try:
+            async for search_data, error in pages:
+                if error:
+                    logger.error(f"獲取頁面時發生錯誤: {error}")
+                    continue
+                for job in search_data.get("list", []):
+                    if emitted >= job_searcher.max_results:
+                        break
+                    emitted += 1
+                    row = JobTransformer.transform_job_list_data(job)
+                    row["search_query"] = job_searcher.keyword
+                    if fetch_details:
+                        detail_tasks.append(
+                            asyncio.ensure_future(
+                                fetch_and_write_details(session, row["job_id"])
+                            )
+                        )
+                    else:
+                        write_row(row)
+                if emitted >= job_searcher.max_results:
+                    break
+        finally:
+            await pages.aclose()
+
+        await asyncio.gather(*detail_tasks)
+
+    return emitted
+
+
+async def run(config, output):
+    """
+    依設定逐一執行每個關鍵字的搜索
+
+    :param config: 設定字典
+    :param output: 可寫入的文字檔案物件
+    :return: 輸出的職缺總數
+    """
+    from main import JobSearcher
+
+    def write_row(row):
+        output.write(json.dumps(row, ensure_ascii=False, default=str) + "\n")
+        output.flush()
+
+    filter_parameters = {
+        key: ",".join(map(str, value)) if isinstance(value, list) else value
+        for key, value in config["filters"].items()
+        if value not in (None, "", [])
+    }
+
+    total = 0
+    for query in config["queries"]:
+        job_searcher = JobSearcher(
+            keyword=query,
+            max_results=config["max_results"],
+            filter_parameters=filter_parameters,
+            sort_by=config["sort_by"],
+            ascending_order=config["ascending"],
+        )
+        count = await stream_jobs(job_searcher, write_row, config["details"])
+        logger.info(f"關鍵字「{query}」輸出 {count} 筆職缺")
+        total += count
+    return total
+
+
+def main(argv=None):
+    """
+    命令列進入點
+
+    :param argv: 命令列參數列表，預設為 sys.argv[1:]
+    :return: 結束代碼
+    """
+    parser = build_argument_parser()
+    args = parser.parse_args(argv)
+    try:
+        config = load_config(args)
+    except OSError as e:
+        parser.error(f"無法讀取設定檔: {e}")
+    except ValueError as e:
+        parser.error(f"設定檔格式錯誤: {e}")
+    if not config["queries"]:
+        parser.error("請指定至少一個搜索關鍵字（命令列參數或設定檔中的 queries）")
+
+    # 匯入 main 時會設定日誌格式；日誌一律輸出到標準錯誤，不影響 JSONL 輸出
+    import main as job_search  # noqa: F401
+
+    if args.quiet:
+        logging.getLogger().setLevel(logging.WARNING)
+
+    try:
+        output = (
+            sys.stdout
+            if config["output"] == "-"
+            else open(config["output"], "w", encoding="utf-8")
+        )
+    except OSError as e:
+        parser.error(f"無法開啟輸出檔案: {e}")
+    try:
+        asyncio.run(run(config, output))
+    except BrokenPipeError:
+        # 下游管線（例如 head）提前關閉時安靜結束
+        devnull = os.open(os.devnull, os.O_WRONLY)
+        os.dup2(devnull, sys.stdout.fileno())
+        return 1
+    finally:
+        if output is not sys.stdout:
+            output.close()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
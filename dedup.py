@@ -0,0 +1,388 @@
+"""
+職缺近似重複偵測
+
+以 MinHash 簽章搭配 LSH (Locality-Sensitive Hashing) 分桶，找出不同
+job_id 但內容幾乎相同的職缺（例如人力仲介代徵或同公司重新刊登）。
+
+新職缺只會與落在相同 LSH 桶中的候選職缺比對，不需要兩兩比較，
+因此索引可以累積到數十萬筆職缺並逐次增量更新。簽章與分段雜湊都保存在
+預先配置的 numpy 陣列中，每筆職缺約佔 1 KB 記憶體。
+"""
+
+import logging
+import os
+import pickle
+import re
+import tempfile
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+# MinHash 使用 (a * x + b) mod p 的雜湊排列，p 為梅森質數；
+# x、a、b 皆小於 2^32，乘積不會超出 uint64 的範圍
+MERSENNE_PRIME = np.uint64((1 << 61) - 1)
+MAX_HASH = np.uint64((1 << 32) - 1)
+
+# 計算字元 n-gram 滾動雜湊時使用的基數
+SHINGLE_BASE = np.uint64(1000003)
+
+# 陣列容量不足時以倍數擴充，初始容量為此值
+INITIAL_CAPACITY = 1024
+# 尚未排入分段排序索引的新職缺達到此數量時，將其插入排序索引
+UNSORTED_LIMIT = 1024
+
+FINGERPRINT_COLUMNS = ["job_name", "company_name", "job_description"]
+
+
+def _normalize_text(text):
+    """
+    正規化文字：轉小寫並移除空白與標點，降低排版差異的影響
+
+    :param text: 原始文字
+    :return: 正規化後的文字
+    """
+    return re.sub(r"[\W_]+", "", str(text).lower())
+
+
+def _shingle_hashes(text, shingle_size):
+    """
+    以向量化方式計算文字中所有字元 n-gram 的 32 位元雜湊
+
+    :param text: 正規化後的文字
+    :param shingle_size: n-gram 長度
+    :return: 去重後的雜湊陣列 (uint64)
+    """
+    if len(text) < shingle_size:
+        return np.array([], dtype=np.uint64)
+
+    code_points = np.frombuffer(text.encode("utf-32-le"), dtype=np.uint32).astype(
+        np.uint64
+    )
+    window_count = len(code_points) - shingle_size + 1
+    hashes = np.zeros(window_count, dtype=np.uint64)
+    for offset in range(shingle_size):
+        hashes = hashes * SHINGLE_BASE + code_points[offset : offset + window_count]
+    return np.unique(hashes & MAX_HASH)
+
+
+class JobDeduplicator:
+    """
+    職缺近似重複偵測器類別
+
+    負責計算職缺的 MinHash 簽章、維護 LSH 索引，並將近似重複的職缺
+    歸入同一個群集。群集 ID 為該群集中最早加入索引之職缺的 job_id。
+    """
+
+    def __init__(
+        self, num_perm=128, num_bands=16, shingle_size=3, threshold=0.8, seed=1
+    ):
+        """
+        初始化 JobDeduplicator 實例
+
+        :param num_perm: MinHash 排列數量，預設為 128
+        :param num_bands: LSH 分段數量，需能整除 num_perm，預設為 16
+        :param shingle_size: 字元 n-gram 長度，預設為 3
+        :param threshold: 判定為近似重複的 Jaccard 相似度門檻，預設為 0.8
+        :param seed: 產生雜湊排列的亂數種子，預設為 1
+        """
+        if num_perm % num_bands != 0:
+            raise ValueError("num_perm 必須能被 num_bands 整除")
+
+        self.num_perm = num_perm
+        self.num_bands = num_bands
+        self.rows_per_band = num_perm // num_bands
+        self.shingle_size = shingle_size
+        self.threshold = threshold
+
+        self.seed = seed
+
+        generator = np.random.RandomState(seed)
+        self._perm_a = generator.randint(1, MAX_HASH, size=num_perm, dtype=np.uint64)
+        self._perm_b = generator.randint(0, MAX_HASH, size=num_perm, dtype=np.uint64)
+        # 將每個分段的簽章值組合為 64 位元雜湊時使用的奇數乘數
+        self._band_multipliers = generator.randint(
+            1, np.iinfo(np.uint64).max, size=self.rows_per_band, dtype=np.uint64
+        ) | np.uint64(1)
+
+        self._index_of = {}  # job_id -> 索引位置
+        self._job_ids = []  # 索引位置 -> job_id
+        # 以下陣列依索引位置排列，容量不足時以倍數擴充
+        self._signatures = np.zeros((0, num_perm), dtype=np.uint32)
+        self._has_signature = np.zeros(0, dtype=bool)
+        self._band_hashes = np.zeros((0, num_bands), dtype=np.uint64)
+        self._parents = np.zeros(0, dtype=np.int64)  # union-find 父節點
+        self._reset_sorted_index()
+
+    def __len__(self):
+        return len(self._job_ids)
+
+    def __contains__(self, job_id):
+        return job_id in self._index_of
+
+    def __getstate__(self):
+        # 只保存已使用的部分；排序索引可由分段雜湊重建，不需要保存
+        state = self.__dict__.copy()
+        size = len(self)
+        for name in ("_signatures", "_has_signature", "_band_hashes", "_parents"):
+            state[name] = state[name][:size].copy()
+        for name in ("_sorted_count", "_sorted_positions", "_sorted_hashes"):
+            del state[name]
+        return state
+
+    def __setstate__(self, state):
+        if "_buckets" in state:
+            raise ValueError("重複職缺索引為舊版格式，請刪除索引後重建")
+        self.__dict__.update(state)
+        self._reset_sorted_index()
+        self._update_sorted_index()
+
+    def _reset_sorted_index(self):
+        self._sorted_count = 0  # 已排入排序索引的索引位置數量
+        self._sorted_positions = [
+            np.zeros(0, dtype=np.int32) for _ in range(self.num_bands)
+        ]
+        self._sorted_hashes = [
+            np.zeros(0, dtype=np.uint64) for _ in range(self.num_bands)
+        ]
+
+    def _update_sorted_index(self):
+        """
+        將尚未排序的新職缺依各分段雜湊插入排序索引，讓候選查詢可以使用二分搜尋
+        """
+        size = len(self)
+        positions = (
+            np.flatnonzero(self._has_signature[self._sorted_count : size])
+            + self._sorted_count
+        ).astype(np.int32)
+        for band in range(self.num_bands):
+            hashes = self._band_hashes[positions, band]
+            order = np.argsort(hashes, kind="stable")
+            sorted_hashes = self._sorted_hashes[band]
+            insert_at = sorted_hashes.searchsorted(hashes[order], side="right")
+            self._sorted_hashes[band] = np.insert(
+                sorted_hashes, insert_at, hashes[order]
+            )
+            self._sorted_positions[band] = np.insert(
+                self._sorted_positions[band], insert_at, positions[order]
+            )
+        self._sorted_count = size
+
+    def _ensure_capacity(self, size):
+        """
+        確保各陣列至少能容納 size 筆職缺
+
+        :param size: 需要的容量
+        """
+        capacity = len(self._parents)
+        if size <= capacity:
+            return
+        capacity = max(size, capacity * 2, INITIAL_CAPACITY)
+        for name in ("_signatures", "_has_signature", "_band_hashes", "_parents"):
+            current = getattr(self, name)
+            grown = np.zeros((capacity,) + current.shape[1:], dtype=current.dtype)
+            grown[: len(self)] = current[: len(self)]
+            setattr(self, name, grown)
+
+    def compute_signature(self, text):
+        """
+        計算文字的 MinHash 簽章
+
+        :param text: 要計算簽章的文字
+        :return: MinHash 簽章 (uint32 陣列)，若文字過短則回傳 None
+        """
+        hashes = _shingle_hashes(_normalize_text(text), self.shingle_size)
+        if hashes.size == 0:
+            return None
+
+        permuted = (
+            np.outer(hashes, self._perm_a) + self._perm_b
+        ) % MERSENNE_PRIME & MAX_HASH
+        return permuted.min(axis=0).astype(np.uint32)
+
+    def _band_hashes_of(self, signature):
+        """
+        將簽章切分為 LSH 分段，並計算各分段的 64 位元雜湊
+
+        :param signature: MinHash 簽章
+        :return: 各分段的雜湊陣列 (uint64)
+        """
+        bands = signature.reshape(self.num_bands, self.rows_per_band).astype(np.uint64)
+        # uint64 乘法與加總溢位時自動取模，碰撞只會多出候選，之後仍會比對簽章
+        return (bands * self._band_multipliers).sum(axis=1, dtype=np.uint64)
+
+    def _candidates(self, band_hashes):
+        """
+        查詢至少有一個分段雜湊相同的既有職缺
+
+        :param band_hashes: 新職缺的分段雜湊
+        :return: 候選職缺的索引位置陣列
+        """
+        found = []
+        for band, band_hash in enumerate(band_hashes):
+            sorted_hashes = self._sorted_hashes[band]
+            start = sorted_hashes.searchsorted(band_hash, side="left")
+            end = sorted_hashes.searchsorted(band_hash, side="right")
+            if end > start:
+                found.append(self._sorted_positions[band][start:end])
+
+        # 尚未排入排序索引的新職缺直接以向量化比對
+        size = len(self)
+        unsorted = (self._band_hashes[self._sorted_count : size] == band_hashes).any(
+            axis=1
+        ) & self._has_signature[self._sorted_count : size]
+        found.append(np.flatnonzero(unsorted) + self._sorted_count)
+        return np.unique(np.concatenate(found))
+
+    def _find(self, position):
+        """
+        查找索引位置所屬群集的根節點（含路徑壓縮）
+
+        :param position: 索引位置
+        :return: 根節點索引位置
+        """
+        root = position
+        while self._parents[root] != root:
+            root = int(self._parents[root])
+        while self._parents[position] != root:
+            self._parents[position], position = root, int(self._parents[position])
+        return root
+
+    def _union(self, first, second):
+        """
+        合併兩個群集，並以較早加入索引的職缺作為根節點
+
+        :param first: 索引位置
+        :param second: 索引位置
+        """
+        first_root, second_root = self._find(first), self._find(second)
+        if first_root != second_root:
+            root, child = sorted((first_root, second_root))
+            self._parents[child] = root
+
+    def add(self, job_id, text):
+        """
+        將單一職缺加入索引，並與既有的近似重複職缺合併群集
+
+        已存在於索引中的 job_id 不會重複加入。
+
+        :param job_id: 職缺 ID
+        :param text: 用於指紋的文字
+        :return: 該職缺的群集 ID
+        """
+        if job_id in self._index_of:
+            return self.cluster_id(job_id)
+
+        position = len(self._job_ids)
+        signature = self.compute_signature(text)
+        self._ensure_capacity(position + 1)
+        self._parents[position] = position
+
+        if signature is not None:
+            band_hashes = self._band_hashes_of(signature)
+            candidates = self._candidates(band_hashes)
+            self._signatures[position] = signature
+            self._band_hashes[position] = band_hashes
+            self._has_signature[position] = True
+
+        self._index_of[job_id] = position
+        self._job_ids.append(job_id)
+        if signature is None:
+            return job_id
+
+        similarities = (self._signatures[candidates] == signature).mean(axis=1)
+        for candidate in candidates[similarities >= self.threshold]:
+            self._union(position, int(candidate))
+
+        if len(self) - self._sorted_count >= UNSORTED_LIMIT:
+            self._update_sorted_index()
+        return self.cluster_id(job_id)
+
+    def cluster_id(self, job_id):
+        """
+        查詢職缺的群集 ID
+
+        :param job_id: 職缺 ID
+        :return: 群集 ID，若職缺不在索引中則回傳 job_id 本身
+        """
+        position = self._index_of.get(job_id)
+        if position is None:
+            return job_id
+        return self._job_ids[self._find(position)]
+
+    def add_frame(self, df, columns=None):
+        """
+        將 DataFrame 中的職缺加入索引
+
+        :param df: 包含職缺信息的 DataFrame，需有 job_id 欄位
+        :param columns: 用於指紋的欄位列表，預設為 job_name、company_name、job_description
+        :return: 與 df 索引對齊的群集 ID 列表
+        """
+        columns = [col for col in (columns or FINGERPRINT_COLUMNS) if col in df.columns]
+        texts = df[columns].fillna("").astype(str).agg(" ".join, axis=1)
+        for job_id, text in zip(df["job_id"], texts):
+            self.add(job_id, text)
+        # 在全部加入後再查詢，確保同批次中後續合併的群集 ID 一致
+        return self.cluster_ids(df["job_id"])
+
+    def cluster_ids(self, job_ids):
+        """
+        批次查詢群集 ID
+
+        :param job_ids: 職缺 ID 序列
+        :return: 群集 ID 列表
+        """
+        return [self.cluster_id(job_id) for job_id in job_ids]
+
+    def save(self, path):
+        """
+        將索引保存到檔案
+
+        先寫入同目錄下的暫存檔，再以原子性的 rename 取代原檔案，
+        中途被中斷時不會留下寫到一半的索引。
+
+        :param path: 索引檔案路徑
+        """
+        directory = os.path.dirname(os.path.abspath(path))
+        fd, temp_path = tempfile.mkstemp(
+            dir=directory, prefix=f".{os.path.basename(path)}.", suffix=".tmp"
+        )
+        try:
+            with os.fdopen(fd, "wb") as f:
+                pickle.dump(self, f, protocol=pickle.HIGHEST_PROTOCOL)
+            os.replace(temp_path, path)
+        except BaseException:
+            os.remove(temp_path)
+            raise
+        logger.info(f"重複職缺索引已保存到 {path}（共 {len(self)} 筆）")
+
+    @classmethod
+    def load_or_create(cls, path, **kwargs):
+        """
+        從檔案載入索引，若檔案不存在則建立新的索引
+
+        已保存的索引無法改變簽章相關參數（num_perm、num_bands、shingle_size、
+        seed），與 kwargs 不符時會拋出 ValueError；threshold 則會套用新值。
+
+        :param path: 索引檔案路徑
+        :param kwargs: 建構子參數
+        :return: JobDeduplicator 實例
+        """
+        if not os.path.exists(path):
+            return cls(**kwargs)
+
+        with open(path, "rb") as f:
+            deduplicator = pickle.load(f)
+        for name in ("num_perm", "num_bands", "shingle_size", "seed"):
+            if name in kwargs and kwargs[name] != getattr(deduplicator, name, None):
+                raise ValueError(
+                    f"索引 {path} 的 {name} 為 {getattr(deduplicator, name, None)}，"
+                    f"與指定的 {kwargs[name]} 不符，請刪除索引後重建"
+                )
+        if "threshold" in kwargs and kwargs["threshold"] != deduplicator.threshold:
+            logger.warning(
+                f"索引 {path} 的 threshold 由 {deduplicator.threshold} 改為 {kwargs['threshold']}，"
+                "只影響之後加入的職缺"
+            )
+            deduplicator.threshold = kwargs["threshold"]
+        return deduplicator
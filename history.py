@@ -0,0 +1,378 @@
+"""
+職缺歷史資料庫
+
+將每次爬取的職缺快照以 Parquet 欄式檔案追加保存，並依快照日期分區
+（listings/snapshot_date=YYYY-MM-DD/）。職缺詳細資訊以內容雜湊去重，
+相同內容只保存一次，快照中僅以 detail_hash 欄位參照。
+
+查詢時只讀取所需的日期分區與欄位，即使累積一整年的每小時快照，
+仍能維持低儲存成本與快速掃描。
+"""
+
+import hashlib
+import json
+import logging
+import os
+from datetime import datetime
+
+import pandas as pd
+import pyarrow as pa
+import pyarrow.dataset as ds
+import pyarrow.parquet as pq
+
+logger = logging.getLogger(__name__)
+
+LISTINGS_DIR = "listings"
+DETAILS_DIR = "details"
+SNAPSHOT_PARTITION = "snapshot_date"
+DETAIL_PARTITION = "first_seen_date"
+# 由其他模組衍生、可能隨時間改變的欄位，不列入詳細資訊的內容雜湊
+DERIVED_DETAIL_COLUMNS = ["cluster_id"]
+
+
+def normalize_for_parquet(df):
+    """
+    將 DataFrame 轉換為可穩定寫入 Parquet 的格式
+
+    列表與字典型別的欄位（例如 tags）會轉為 JSON 字串。
+
+    :param df: 原始 DataFrame
+    :return: 轉換後的 DataFrame 副本
+    """
+    df = df.copy()
+    for col in df.columns:
+        if df[col].dtype == object:
+            df[col] = df[col].map(
+                lambda x: (
+                    json.dumps(x, ensure_ascii=False, default=str)
+                    if isinstance(x, (list, dict))
+                    else x
+                )
+            )
+    return df
+
+
+def frame_to_table(df):
+    """
+    將 DataFrame 轉換為 Arrow Table，並將全空欄位與字串欄位固定為
+    string 型別，避免不同檔案間的欄位型別不一致
+
+    :param df: 要轉換的 DataFrame
+    :return: pyarrow.Table
+    """
+    table = pa.Table.from_pandas(normalize_for_parquet(df), preserve_index=False)
+    for idx, field in enumerate(table.schema):
+        if pa.types.is_null(field.type) or pa.types.is_large_string(field.type):
+            table = table.set_column(
+                idx, field.name, table.column(idx).cast(pa.string())
+            )
+    return table
+
+
+def compute_content_hash(record):
+    """
+    計算單筆職缺詳細資訊的內容雜湊
+
+    :param record: 職缺詳細資訊字典
+    :return: 十六進位雜湊字串
+    """
+    payload = json.dumps(record, sort_keys=True, ensure_ascii=False, default=str)
+    return hashlib.sha1(payload.encode("utf-8")).hexdigest()
+
+
+def _to_partition_value(value):
+    """
+    將日期類參數轉換為分區值字串 (YYYY-MM-DD)
+
+    :param value: 日期、datetime 或可被 pandas 解析的字串
+    :return: 分區值字串，若 value 為 None 則回傳 None
+    """
+    if value is None:
+        return None
+    return pd.Timestamp(value).strftime("%Y-%m-%d")
+
+
+class JobHistoryStore:
+    """
+    職缺歷史資料庫類別
+
+    負責追加職缺快照、以內容雜湊保存詳細資訊，並提供趨勢查詢介面。
+    """
+
+    def __init__(self, root_dir):
+        """
+        初始化 JobHistoryStore 實例
+
+        :param root_dir: 資料庫根目錄
+        """
+        self.root_dir = root_dir
+        self.listings_dir = os.path.join(root_dir, LISTINGS_DIR)
+        self.details_dir = os.path.join(root_dir, DETAILS_DIR)
+        self._known_hashes = None
+
+    def append_snapshot(
+        self,
+        jobs_df,
+        details_df=None,
+        search_query=None,
+        snapshot_time=None,
+        part=None,
+    ):
+        """
+        追加一次爬取的快照
+
+        :param jobs_df: 包含基本職缺信息的 DataFrame
+        :param details_df: 包含詳細職缺信息的 DataFrame，預設為 None
+        :param search_query: 此次搜索的關鍵字，預設為 None
+        :param snapshot_time: 快照時間，預設為目前時間
+        :param part: 分塊序號；同一次爬取分多次寫入時使用相同的 snapshot_time
+                     與不同的 part，預設為 None
+        :return: 新增的詳細資訊筆數
+        """
+        snapshot_time = pd.Timestamp(snapshot_time or datetime.now())
+        snapshot_date = snapshot_time.strftime("%Y-%m-%d")
+        file_name = f"part-{snapshot_time.strftime('%Y%m%dT%H%M%S%f')}"
+        if part is not None:
+            file_name += f"-{part:06d}"
+        file_name += ".parquet"
+
+        detail_hashes = {}
+        new_details = 0
+        if details_df is not None and not details_df.empty:
+            detail_hashes, new_details = self._append_details(
+                details_df, snapshot_date, file_name
+            )
+
+        if jobs_df.empty:
+            logger.info("快照中沒有職缺資料，略過寫入")
+            return new_details
+
+        listings = jobs_df.copy()
+        listings["snapshot_time"] = snapshot_time
+        listings["search_query"] = search_query
+        listings["detail_hash"] = listings["job_id"].map(
+            lambda job_id: detail_hashes.get(job_id)
+        )
+
+        partition_dir = os.path.join(
+            self.listings_dir, f"{SNAPSHOT_PARTITION}={snapshot_date}"
+        )
+        os.makedirs(partition_dir, exist_ok=True)
+        pq.write_table(frame_to_table(listings), os.path.join(partition_dir, file_name))
+        logger.info(
+            f"已寫入 {len(listings)} 筆職缺快照，新增 {new_details} 筆詳細資訊到 {self.root_dir}"
+        )
+        return new_details
+
+    def _append_details(self, details_df, snapshot_date, file_name):
+        """
+        以內容雜湊保存尚未出現過的詳細資訊
+
+        :param details_df: 包含詳細職缺信息的 DataFrame
+        :param snapshot_date: 快照日期字串
+        :param file_name: 輸出檔名
+        :return: job_id 對應內容雜湊的字典、新增的詳細資訊筆數
+        """
+        details = details_df.drop(columns=DERIVED_DETAIL_COLUMNS, errors="ignore")
+        details["content_hash"] = [
+            compute_content_hash(record) for record in details.to_dict(orient="records")
+        ]
+
+        known_hashes = self._load_known_hashes()
+        new_details = details[~details["content_hash"].isin(known_hashes)]
+        new_details = new_details.drop_duplicates(subset="content_hash")
+        if not new_details.empty:
+            partition_dir = os.path.join(
+                self.details_dir, f"{DETAIL_PARTITION}={snapshot_date}"
+            )
+            os.makedirs(partition_dir, exist_ok=True)
+            pq.write_table(
+                frame_to_table(new_details), os.path.join(partition_dir, file_name)
+            )
+            known_hashes.update(new_details["content_hash"])
+
+        detail_hashes = (
+            details.drop_duplicates(subset="job_id", keep="last")
+            .set_index("job_id")["content_hash"]
+            .to_dict()
+        )
+        return detail_hashes, len(new_details)
+
+    def _load_known_hashes(self):
+        """
+        讀取已保存的內容雜湊集合（只讀取 content_hash 欄位）
+
+        :return: 內容雜湊集合
+        """
+        if self._known_hashes is None:
+            hashes = self._read(self.details_dir, DETAIL_PARTITION, ["content_hash"])
+            self._known_hashes = set(hashes["content_hash"])
+        return self._known_hashes
+
+    @staticmethod
+    def _read(base_dir, partition_name, columns, filter_expression=None):
+        """
+        從分區資料集讀取指定欄位
+
+        :param base_dir: 資料集目錄
+        :param partition_name: 分區欄位名稱
+        :param columns: 要讀取的欄位列表
+        :param filter_expression: pyarrow 篩選條件，預設為 None
+        :return: DataFrame
+        """
+        if not os.path.isdir(base_dir):
+            return pd.DataFrame(columns=columns)
+
+        partition_schema = pa.schema([(partition_name, pa.string())])
+        partitioning = ds.partitioning(partition_schema, flavor="hive")
+        dataset = ds.dataset(base_dir, format="parquet", partitioning=partitioning)
+
+        # 資料集預設只採用第一個檔案的欄位結構；若需要的欄位是之後才新增的
+        # （例如 cluster_id），則合併符合篩選條件之分區內檔案的欄位結構
+        if columns is None or not set(columns) <= set(dataset.schema.names):
+            fragments = (
+                dataset.get_fragments()
+                if filter_expression is None
+                else dataset.get_fragments(filter=filter_expression)
+            )
+            schema = pa.unify_schemas(
+                [fragment.physical_schema for fragment in fragments]
+                + [partition_schema]
+            )
+            dataset = dataset.replace_schema(schema)
+        if columns is not None:
+            columns = [col for col in columns if col in dataset.schema.names]
+        table = dataset.to_table(columns=columns, filter=filter_expression)
+        return table.to_pandas()
+
+    def read_listings(
+        self, columns=None, start=None, end=None, search_query=None, job_ids=None
+    ):
+        """
+        讀取職缺快照
+
+        只會掃描 start 到 end 之間的日期分區，並只讀取指定欄位。
+
+        :param columns: 要讀取的欄位列表，預設為全部欄位
+        :param start: 起始日期（含），預設為 None
+        :param end: 結束日期（含），預設為 None
+        :param search_query: 限定的搜索關鍵字，預設為 None
+        :param job_ids: 限定的職缺 ID 列表，預設為 None
+        :return: 職缺快照 DataFrame
+        """
+        conditions = []
+        start, end = _to_partition_value(start), _to_partition_value(end)
+        if start:
+            conditions.append(ds.field(SNAPSHOT_PARTITION) >= start)
+        if end:
+            conditions.append(ds.field(SNAPSHOT_PARTITION) <= end)
+        if search_query is not None:
+            conditions.append(ds.field("search_query") == search_query)
+        if job_ids is not None:
+            conditions.append(ds.field("job_id").isin(list(job_ids)))
+
+        filter_expression = None
+        for condition in conditions:
+            filter_expression = (
+                condition
+                if filter_expression is None
+                else filter_expression & condition
+            )
+        return self._read(
+            self.listings_dir, SNAPSHOT_PARTITION, columns, filter_expression
+        )
+
+    def read_details(self, content_hashes=None, columns=None):
+        """
+        讀取以內容雜湊保存的職缺詳細資訊
+
+        :param content_hashes: 限定的內容雜湊列表，預設為全部
+        :param columns: 要讀取的欄位列表，預設為全部欄位
+        :return: 職缺詳細資訊 DataFrame
+        """
+        filter_expression = None
+        if content_hashes is not None:
+            filter_expression = ds.field("content_hash").isin(list(content_hashes))
+        return self._read(
+            self.details_dir, DETAIL_PARTITION, columns, filter_expression
+        )
+
+    def applicants_over_time(self, job_id, start=None, end=None):
+        """
+        查詢單一職缺的應徵人數變化
+
+        :param job_id: 職缺 ID
+        :param start: 起始日期（含），預設為 None
+        :param end: 結束日期（含），預設為 None
+        :return: 以 snapshot_time 排序的 DataFrame (snapshot_time, application_count)
+        """
+        df = self.read_listings(
+            columns=["snapshot_time", "application_count"],
+            start=start,
+            end=end,
+            job_ids=[job_id],
+        )
+        return (
+            df.drop_duplicates(subset="snapshot_time")
+            .sort_values("snapshot_time")
+            .reset_index(drop=True)
+        )
+
+    def salary_range_over_time(self, job_id, start=None, end=None):
+        """
+        查詢單一職缺的薪資範圍變化
+
+        :param job_id: 職缺 ID
+        :param start: 起始日期（含），預設為 None
+        :param end: 結束日期（含），預設為 None
+        :return: 以 snapshot_time 排序的 DataFrame (snapshot_time, salary_low, salary_high)
+        """
+        df = self.read_listings(
+            columns=["snapshot_time", "salary_low", "salary_high"],
+            start=start,
+            end=end,
+            job_ids=[job_id],
+        )
+        return (
+            df.drop_duplicates(subset="snapshot_time")
+            .sort_values("snapshot_time")
+            .reset_index(drop=True)
+        )
+
+    def posting_volume(self, search_query=None, start=None, end=None):
+        """
+        查詢每次快照的職缺數量
+
+        :param search_query: 限定的搜索關鍵字，預設為 None
+        :param start: 起始日期（含），預設為 None
+        :param end: 結束日期（含），預設為 None
+        :return: 以 snapshot_time 為索引的職缺數量 Series
+        """
+        df = self.read_listings(
+            columns=["snapshot_time", "job_id"],
+            start=start,
+            end=end,
+            search_query=search_query,
+        )
+        return df.groupby("snapshot_time")["job_id"].nunique().rename("posting_count")
+
+    def new_postings_per_day(self, search_query=None, start=None, end=None):
+        """
+        查詢每日新出現的職缺數量
+
+        職缺第一次出現在快照中的日期視為新增日期，因此會讀取 end 之前的
+        所有分區，但只讀取 job_id 與 snapshot_date 兩個欄位。
+
+        :param search_query: 限定的搜索關鍵字，預設為 None
+        :param start: 起始日期（含），預設為 None
+        :param end: 結束日期（含），預設為 None
+        :return: 以日期為索引的新增職缺數量 Series
+        """
+        df = self.read_listings(
+            columns=["job_id", SNAPSHOT_PARTITION], end=end, search_query=search_query
+        )
+        first_seen = df.groupby("job_id")[SNAPSHOT_PARTITION].min()
+        start = _to_partition_value(start)
+        if start:
+            first_seen = first_seen[first_seen >= start]
+        return first_seen.value_counts().sort_index().rename("new_postings")
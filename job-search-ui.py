@@ -5,11 +5,21 @@ from main import (
     search_and_export_basic_job_info,
     fetch_and_export_detailed_job_info,
 )
+from history import JobHistoryStore
+from dedup import JobDeduplicator
+from analytics import MarketRollups
 import pandas as pd
 import io
 import zipfile
 import base64
 
+# 歷史快照保存目錄（與 main.py 共用）
+HISTORY_DIR = "job_history"
+# 重複職缺索引檔案
+DEDUP_INDEX_PATH = "job_dedup_index.pkl"
+# 市場統計快取目錄（與 pages/1_市場分析.py 共用）
+ANALYTICS_CACHE_DIR = "job_analytics"
+
 # 定義選項列表
 ro_options = [("0", "全部"), ("1", "全職"), ("2", "兼職"), ("3", "高階"), ("4", "派遣")]
 isnew_options = [
@@ -77,6 +87,7 @@ with col1:
         ["relevance", "experience", "education", "applicants", "salary", "date"],
     )
     sort_ascending = st.checkbox("升序排序")
+    detect_duplicates = st.checkbox("標記近似重複職缺 (cluster_id)")
 
 with col2:
     st.header("過濾參數")
@@ -225,11 +236,23 @@ if st.button("搜索職缺"):
         ascending_order=sort_ascending,
     )
 
+    deduplicator = (
+        JobDeduplicator.load_or_create(DEDUP_INDEX_PATH) if detect_duplicates else None
+    )
+
     with st.spinner("正在搜索職缺並獲取詳細資訊..."):
         basic_job_info = asyncio.run(search_and_export_basic_job_info(job_searcher))
         detailed_job_info = asyncio.run(
-            fetch_and_export_detailed_job_info(job_searcher, basic_job_info)
+            fetch_and_export_detailed_job_info(
+                job_searcher, basic_job_info, deduplicator
+            )
         )
+    if deduplicator is not None:
+        deduplicator.save(DEDUP_INDEX_PATH)
+    JobHistoryStore(HISTORY_DIR).append_snapshot(
+        basic_job_info, detailed_job_info, search_query=keyword
+    )
+    MarketRollups(ANALYTICS_CACHE_DIR).update(basic_job_info, detailed_job_info)
 
     st.success(f"搜索完成！找到 {len(basic_job_info)} 個職缺。")
 
@@ -284,6 +307,7 @@ st.markdown(
 3. 點擊「搜索職缺」按鈕開始搜索。
 4. 搜索結果將顯示在下方，您可以查看基本資訊和詳細資訊。
 5. 使用提供的下載連結獲取完整的 Excel 文件。
+6. 每次搜索的結果都會累積到左側「市場分析」頁面的統計中。
 """
 )
 st.markdown("#### 注意事項")
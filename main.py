@@ -14,10 +14,14 @@
 2. 獲取職缺的基本資訊和詳細資訊
 3. 將獲取的資訊匯出為 Excel 文件
 4. 提供簡單的職缺統計分析
+5. 將每次爬取的快照保存到依日期分區的歷史資料庫，以便查詢趨勢
+6. 以 MinHash/LSH 偵測跨公司與重新刊登的近似重複職缺
+7. 累積薪資、技能與福利等市場統計，並在 Streamlit 儀表板中顯示
+8. 低記憶體模式：將結果分塊寫入磁碟，可在小型容器中爬取大量職缺
 
 技術細節：
 - 使用的程式語言：Python 3.7+
-- 主要依賴庫：asyncio, aiohttp, pandas, tqdm, openpyxl
+- 主要依賴庫：asyncio, aiohttp, pandas, tqdm, openpyxl, pyarrow, numpy
 - 運行環境要求：支持異步操作的 Python 環境
 
 使用說明：
@@ -25,6 +29,8 @@
 2. 在 main 函數中設置搜索參數（關鍵字、最大結果數、排序方式等）
 3. 運行程式
 4. 程式將自動搜索職缺，獲取詳細信息，並將結果保存為 Excel 文件
+5. 排程或批次使用時，可改用 cli.py 以命令列參數或設定檔指定搜索條件，
+   並以 JSONL 格式串流輸出結果
 
 注意事項：
 - 請遵守 104 人力銀行的使用條款和爬蟲政策
@@ -36,12 +42,15 @@
 """
 
 import asyncio
+import os
 import random
+import shutil
+from datetime import datetime
 import aiohttp
-import pandas as pd
-from tqdm import tqdm
 import logging
-from openpyxl.utils import get_column_letter
+
+# pandas、tqdm、openpyxl 等較重的依賴庫只在使用到的階段才匯入，
+# 讓命令列工具 (cli.py) 能快速啟動
 
 # 設置日誌
 logging.basicConfig(
@@ -140,37 +149,66 @@ class JobSearcher:
         :param search_query: 搜索查詢字符串
         :return: 職缺列表、總職缺數量、錯誤列表
         """
+        from tqdm import tqdm
+
         job_listings = []
         total_job_count = 0
         errors = []
-        pages_to_fetch = (self.max_results - 1) // 20 + 1
 
         async with aiohttp.ClientSession() as session:
-            tasks = [
-                self.fetch_page(session, search_query, page)
-                for page in range(1, pages_to_fetch + 1)
-            ]
-
-            for future in tqdm(
-                asyncio.as_completed(tasks),
-                total=pages_to_fetch,
-                desc="正在獲取職缺基本資訊",
-                unit="頁",
-            ):
-                search_data, error = await future
-                if error:
-                    errors.append(error)
-                    logger.error(f"獲取頁面時發生錯誤: {error}")
-                else:
-                    total_job_count = search_data.get("totalCount", 0)
-                    new_job_listings = search_data.get("list", [])
-                    job_listings.extend(new_job_listings)
-
-                    if len(job_listings) >= self.max_results:
-                        break
+            pages = self.iter_search_pages(session, search_query)
+            try:
+                with tqdm(
+                    total=self.pages_to_fetch(), desc="正在獲取職缺基本資訊", unit="頁"
+                ) as progress_bar:
+                    async for search_data, error in pages:
+                        progress_bar.update(1)
+                        if error:
+                            errors.append(error)
+                            logger.error(f"獲取頁面時發生錯誤: {error}")
+                        else:
+                            total_job_count = search_data.get("totalCount", 0)
+                            new_job_listings = search_data.get("list", [])
+                            job_listings.extend(new_job_listings)
+
+                            if len(job_listings) >= self.max_results:
+                                break
+            finally:
+                await pages.aclose()
 
         return job_listings[: self.max_results], total_job_count, errors
 
+    def pages_to_fetch(self):
+        """
+        計算需要獲取的頁數（每頁 20 筆）
+
+        :return: 頁數
+        """
+        return (self.max_results - 1) // 20 + 1
+
+    async def iter_search_pages(self, session, search_query):
+        """
+        依完成順序逐頁產生搜索結果
+
+        呼叫端提前結束迭代時，應呼叫 aclose() 以取消尚未完成的請求。
+
+        :param session: aiohttp 客戶端會話
+        :param search_query: 搜索查詢字符串
+        :return: 非同步產生頁面數據、錯誤信息（如果有）
+        """
+        # 已完成的請求會從 pending 中移除，頁面數據被處理後即可釋放
+        pending = set()
+        for page in range(1, self.pages_to_fetch() + 1):
+            task = asyncio.ensure_future(self.fetch_page(session, search_query, page))
+            task.add_done_callback(pending.discard)
+            pending.add(task)
+        try:
+            for future in asyncio.as_completed(pending):
+                yield await future
+        finally:
+            for task in list(pending):
+                task.cancel()
+
     async def fetch_page(self, session, search_query, page_number):
         """
         獲取單頁職缺資訊
@@ -332,6 +370,8 @@ async def search_and_export_basic_job_info(job_searcher):
     :param job_searcher: JobSearcher 實例
     :return: 包含基本職缺信息的 DataFrame
     """
+    import pandas as pd
+
     logger.info("開始搜尋職缺基本資訊")
     total_job_count, job_listings, errors = await job_searcher.search_jobs()
     logger.info(f"找到的總職缺數量: {total_job_count}")
@@ -347,14 +387,21 @@ async def search_and_export_basic_job_info(job_searcher):
     return jobs_df
 
 
-async def fetch_and_export_detailed_job_info(job_searcher, jobs_df):
+async def fetch_and_export_detailed_job_info(job_searcher, jobs_df, deduplicator=None):
     """
     獲取並匯出詳細職缺信息
 
+    若提供 deduplicator，會將詳細資訊加入重複職缺索引，並在兩個 DataFrame
+    中加入 cluster_id 欄位（jobs_df 會被就地更新並重新匯出）。
+
     :param job_searcher: JobSearcher 實例
     :param jobs_df: 包含基本職缺信息的 DataFrame
+    :param deduplicator: JobDeduplicator 實例，預設為 None
     :return: 包含詳細職缺信息的 DataFrame
     """
+    import pandas as pd
+    from tqdm import tqdm
+
     logger.info("開始獲取職缺詳細資訊")
     job_ids = jobs_df["job_id"].tolist()
     jobs_details = []
@@ -378,10 +425,167 @@ async def fetch_and_export_detailed_job_info(job_searcher, jobs_df):
                 logger.error(f"獲取職缺詳細資訊時發生錯誤: {error}")
 
     jobs_details_df = pd.DataFrame(jobs_details)
+    if deduplicator is not None:
+        assign_duplicate_clusters(deduplicator, jobs_df, jobs_details_df)
+        export_to_excel(jobs_df, "job_listings.xlsx")
     export_to_excel(jobs_details_df, "job_listings_details.xlsx")
     return jobs_details_df
 
 
+async def crawl_to_chunks(
+    job_searcher, spill_dir, chunk_size=None, fetch_details=True, process_chunk=None
+):
+    """
+    以固定記憶體用量爬取職缺基本資訊與詳細資訊
+
+    每頁原始數據抵達後立即轉換並釋放，轉換後的資料列每累積 chunk_size 筆
+    就寫成暫存的 Parquet 分塊檔；之後逐塊請求詳細資訊並呼叫 process_chunk，
+    再將（可能已被 process_chunk 加入欄位的）分塊寫成最終的分塊檔。
+    分塊資料的記憶體用量只與 chunk_size 有關，與 max_results 無關。
+
+    :param job_searcher: JobSearcher 實例
+    :param spill_dir: 分塊檔輸出目錄
+    :param chunk_size: 每個分塊的資料列數量，預設為 spill.DEFAULT_CHUNK_SIZE
+    :param fetch_details: 是否獲取詳細資訊，預設為 True
+    :param process_chunk: 每個分塊寫出前呼叫的函數，參數為該分塊的基本資訊
+                          DataFrame、詳細資訊 DataFrame 與分塊序號，可就地加入
+                          欄位，預設為 None
+    :return: 基本資訊與詳細資訊的 ChunkedFrameReader（可逐塊讀取或組合為 DataFrame）
+    """
+    import pandas as pd
+    from tqdm import tqdm
+    from spill import DEFAULT_CHUNK_SIZE, ChunkedFrameWriter
+
+    chunk_size = chunk_size or DEFAULT_CHUNK_SIZE
+    staging_dir = os.path.join(spill_dir, "staging")
+    staging_writer = ChunkedFrameWriter(staging_dir, chunk_size)
+    basic_writer = ChunkedFrameWriter(os.path.join(spill_dir, "listings"), chunk_size)
+    detail_writer = ChunkedFrameWriter(os.path.join(spill_dir, "details"), chunk_size)
+    search_query = job_searcher.build_search_query()
+
+    logger.info("開始以低記憶體模式搜尋職缺基本資訊")
+    async with aiohttp.ClientSession() as session:
+        pages = job_searcher.iter_search_pages(session, search_query)
+        try:
+            with tqdm(
+                total=job_searcher.pages_to_fetch(),
+                desc="正在獲取職缺基本資訊",
+                unit="頁",
+            ) as progress_bar:
+                async for search_data, error in pages:
+                    progress_bar.update(1)
+                    if error:
+                        logger.error(f"獲取頁面時發生錯誤: {error}")
+                        continue
+                    for job in search_data.get("list", []):
+                        if staging_writer.row_count >= job_searcher.max_results:
+                            break
+                        staging_writer.append(
+                            JobTransformer.transform_job_list_data(job)
+                        )
+                    del search_data
+                    if staging_writer.row_count >= job_searcher.max_results:
+                        break
+        finally:
+            await pages.aclose()
+        staged_chunks = staging_writer.close()
+
+        if fetch_details:
+            logger.info("開始以低記憶體模式獲取職缺詳細資訊")
+        with tqdm(
+            total=staging_writer.row_count if fetch_details else 0,
+            desc="正在獲取職缺詳細資訊",
+            unit="個",
+            disable=not fetch_details,
+        ) as progress_bar:
+            for chunk_index, jobs_chunk in enumerate(staged_chunks.iter_frames()):
+                details = []
+                if fetch_details:
+                    tasks = [
+                        job_searcher.fetch_job_details(session, job_id)
+                        for job_id in jobs_chunk["job_id"]
+                    ]
+                    for future in asyncio.as_completed(tasks):
+                        job_info, error = await future
+                        progress_bar.update(1)
+                        if job_info:
+                            details.append(
+                                JobTransformer.transform_job_detail_data(job_info)
+                            )
+                        elif error:
+                            logger.error(f"獲取職缺詳細資訊時發生錯誤: {error}")
+                details_chunk = pd.DataFrame(details)
+                if process_chunk is not None:
+                    process_chunk(jobs_chunk, details_chunk, chunk_index)
+                for row in jobs_chunk.to_dict("records"):
+                    basic_writer.append(row)
+                for row in details_chunk.to_dict("records"):
+                    detail_writer.append(row)
+    shutil.rmtree(staging_dir)
+
+    return basic_writer.close(), detail_writer.close()
+
+
+async def crawl_and_record_in_chunks(
+    job_searcher, spill_dir, deduplicator=None, history_store=None, rollups=None
+):
+    """
+    以低記憶體模式爬取職缺，並逐塊進行重複偵測、歷史快照與市場統計更新
+
+    所有分塊共用同一個快照時間，因此在歷史資料庫中仍視為同一次爬取。
+    分塊檔與歷史資料庫都會包含 cluster_id 欄位，與一般模式匯出的欄位一致。
+
+    分塊資料的記憶體用量固定，但重複職缺索引（每筆職缺約 1 KB）與市場統計
+    的已計入職缺表仍會隨累積的職缺數量成長；記憶體非常有限時可以不傳入
+    deduplicator 或 rollups。
+
+    :param job_searcher: JobSearcher 實例
+    :param spill_dir: 分塊檔輸出目錄
+    :param deduplicator: JobDeduplicator 實例，預設為 None
+    :param history_store: JobHistoryStore 實例，預設為 None
+    :param rollups: MarketRollups 實例，預設為 None
+    :return: 基本資訊與詳細資訊的 ChunkedFrameReader
+    """
+    snapshot_time = datetime.now()
+
+    def process_chunk(jobs_chunk, details_chunk, chunk_index):
+        if deduplicator is not None:
+            assign_duplicate_clusters(deduplicator, jobs_chunk, details_chunk)
+        if history_store is not None:
+            history_store.append_snapshot(
+                jobs_chunk,
+                details_chunk,
+                search_query=job_searcher.keyword,
+                snapshot_time=snapshot_time,
+                part=chunk_index,
+            )
+        if rollups is not None:
+            rollups.update(jobs_chunk, details_chunk)
+
+    basic_chunks, detail_chunks = await crawl_to_chunks(
+        job_searcher, spill_dir, process_chunk=process_chunk
+    )
+    logger.info(f"低記憶體模式：結果已以 Parquet 分塊保存於 {spill_dir}")
+    return basic_chunks, detail_chunks
+
+
+def assign_duplicate_clusters(deduplicator, jobs_df, jobs_details_df):
+    """
+    將詳細職缺信息加入重複職缺索引，並為兩個 DataFrame 加入 cluster_id 欄位
+
+    沒有詳細資訊的職缺不會加入索引，其 cluster_id 即為自身的 job_id。
+
+    :param deduplicator: JobDeduplicator 實例
+    :param jobs_df: 包含基本職缺信息的 DataFrame
+    :param jobs_details_df: 包含詳細職缺信息的 DataFrame
+    """
+    if not jobs_details_df.empty:
+        jobs_details_df["cluster_id"] = deduplicator.add_frame(jobs_details_df)
+    if not jobs_df.empty:
+        jobs_df["cluster_id"] = deduplicator.cluster_ids(jobs_df["job_id"])
+    logger.info(f"重複職缺索引目前共有 {len(deduplicator)} 筆職缺")
+
+
 def export_to_excel(df, filename):
     """
     將 DataFrame 匯出為 Excel 文件
@@ -389,6 +593,9 @@ def export_to_excel(df, filename):
     :param df: 要匯出的 DataFrame
     :param filename: 輸出的 Excel 文件名
     """
+    import pandas as pd
+    from openpyxl.utils import get_column_letter
+
     with pd.ExcelWriter(filename, engine="openpyxl") as writer:
         df.to_excel(writer, index=False, sheet_name="職缺資訊")
         worksheet = writer.sheets["職缺資訊"]
@@ -414,12 +621,22 @@ async def main():
     """
     主函數，協調整個程序的運行
     """
+    from history import JobHistoryStore
+    from dedup import JobDeduplicator
+    from analytics import MarketRollups
+
     try:
         # 配置區域
         SEARCH_KEYWORD = "你的職務名稱"
         MAX_RESULTS = 100
         SORT_TYPE = "relevance"
         SORT_ASCENDING = False
+        HISTORY_DIR = "job_history"  # 歷史快照保存目錄，設為 None 則不保存
+        DEDUP_INDEX_PATH = "job_dedup_index.pkl"  # 重複職缺索引檔案，設為 None 則不偵測
+        ANALYTICS_CACHE_DIR = "job_analytics"  # 市場統計快取目錄，設為 None 則不更新
+        # 設定目錄以啟用低記憶體模式（結果保存為 Parquet 分塊，不匯出 Excel）；
+        # 重複職缺索引仍會隨職缺數量成長，記憶體非常有限時可將 DEDUP_INDEX_PATH 設為 None
+        SPILL_DIR = None
         FILTER_PARAMETERS = {
             # 在這裡添加您需要的篩選參數
             "ro": 0,  # 0 全部, 1 全職, 2 兼職, 3 高階, 4 派遣
@@ -449,11 +666,34 @@ async def main():
             ascending_order=SORT_ASCENDING,
         )
 
-        basic_job_info = await search_and_export_basic_job_info(job_searcher)
-        detailed_job_info = await fetch_and_export_detailed_job_info(
-            job_searcher, basic_job_info
+        deduplicator = (
+            JobDeduplicator.load_or_create(DEDUP_INDEX_PATH)
+            if DEDUP_INDEX_PATH
+            else None
         )
-        display_job_statistics(basic_job_info)
+
+        history_store = JobHistoryStore(HISTORY_DIR) if HISTORY_DIR else None
+        rollups = MarketRollups(ANALYTICS_CACHE_DIR) if ANALYTICS_CACHE_DIR else None
+
+        if SPILL_DIR:
+            # 回傳 ChunkedFrameReader，需要完整 DataFrame 時再呼叫 to_frame()
+            basic_job_info, detailed_job_info = await crawl_and_record_in_chunks(
+                job_searcher, SPILL_DIR, deduplicator, history_store, rollups
+            )
+        else:
+            basic_job_info = await search_and_export_basic_job_info(job_searcher)
+            detailed_job_info = await fetch_and_export_detailed_job_info(
+                job_searcher, basic_job_info, deduplicator
+            )
+            if history_store is not None:
+                history_store.append_snapshot(
+                    basic_job_info, detailed_job_info, search_query=SEARCH_KEYWORD
+                )
+            if rollups is not None:
+                rollups.update(basic_job_info, detailed_job_info)
+            display_job_statistics(basic_job_info)
+        if deduplicator is not None:
+            deduplicator.save(DEDUP_INDEX_PATH)
 
         logger.info("職缺搜尋和分析完成")
         return basic_job_info, detailed_job_info
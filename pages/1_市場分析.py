@@ -0,0 +1,85 @@
+import streamlit as st
+
+from analytics import SALARY_BIN_WIDTHS, MarketRollups, read_cache_version
+
+# 與 job-search-ui.py 共用的市場統計快取目錄
+ANALYTICS_CACHE_DIR = "job_analytics"
+
+DIMENSION_LABELS = {
+    "area": "地區",
+    "industry": "產業",
+    "experience": "工作經驗",
+    "education": "學歷要求",
+}
+SALARY_FIELD_LABELS = {"salary_low": "最低薪資", "salary_high": "最高薪資"}
+
+
+@st.cache_resource(max_entries=1)
+def load_rollups(cache_dir, version):
+    """
+    載入指定版本的市場統計 rollup；只有在新的爬取結果寫入後才會重新載入，
+    且只保留最新版本
+
+    :param cache_dir: rollup 快取目錄
+    :param version: manifest 中的 rollup 版本
+    :return: MarketRollups 實例
+    """
+    return MarketRollups(cache_dir, version)
+
+
+st.set_page_config(page_title="職缺市場分析", page_icon="📊", layout="wide")
+st.title("職缺市場分析")
+
+version = read_cache_version(ANALYTICS_CACHE_DIR)
+if version is None:
+    st.info("尚無統計資料，請先在搜索頁面執行職缺搜索。")
+    st.stop()
+
+rollups = load_rollups(ANALYTICS_CACHE_DIR, version)
+
+col1, col2 = st.columns(2)
+col1.metric("累計職缺數", f"{rollups.job_count:,}")
+col2.metric("累計詳細資訊數", f"{rollups.detail_count:,}")
+
+st.header("薪資與職缺分布")
+col_dimension, col_salary, col_unit = st.columns(3)
+with col_dimension:
+    dimension = st.selectbox(
+        "分析維度",
+        list(DIMENSION_LABELS),
+        format_func=lambda x: DIMENSION_LABELS[x],
+    )
+with col_salary:
+    salary_field = st.selectbox(
+        "薪資欄位",
+        list(SALARY_FIELD_LABELS),
+        format_func=lambda x: SALARY_FIELD_LABELS[x],
+    )
+with col_unit:
+    salary_unit = st.selectbox("薪資單位", list(SALARY_BIN_WIDTHS))
+
+percentiles = rollups.salary_percentiles(dimension, salary_field, salary_unit)
+col_table, col_chart = st.columns(2)
+with col_table:
+    st.subheader("薪資百分位數")
+    st.dataframe(percentiles)
+with col_chart:
+    st.subheader("職缺數量")
+    st.bar_chart(rollups.posting_counts(dimension).head(20))
+
+st.header("技能與福利")
+col_skill, col_welfare = st.columns(2)
+with col_skill:
+    st.subheader("熱門技能 (前 20 名)")
+    st.bar_chart(rollups.skill_frequency(top_n=20))
+with col_welfare:
+    st.subheader("福利標籤普及率")
+    st.bar_chart(rollups.welfare_prevalence())
+
+st.markdown("---")
+st.markdown(
+    """
+- 薪資百分位數依薪資單位分開估算，以薪資直方圖的分組中點近似（月薪每 1,000 元、年薪每 10,000 元、日薪每 100 元、時薪每 10 元為一組）；面議未列薪資、論件計酬與「以上」的薪資不列入計算。
+- 每個職缺只會被計入一次，重複搜索到的職缺不會重複計算。
+"""
+)
@@ -0,0 +1,168 @@
+"""
+低記憶體分塊暫存
+
+爬取大量職缺時，將轉換後的資料列累積到固定筆數後立即寫成 Parquet 分塊檔，
+記憶體中最多只保留一個分塊的資料列。之後可逐塊讀取（lazy reader），
+或在需要時才組合成完整的 DataFrame。
+"""
+
+import glob
+import json
+import logging
+import os
+
+import pandas as pd
+import pyarrow.parquet as pq
+
+from history import frame_to_table
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_CHUNK_SIZE = 5000
+
+# Parquet 中繼資料鍵：記錄哪些欄位原本是列表或字典、寫入時被轉為 JSON 字串
+JSON_COLUMNS_METADATA_KEY = b"json_columns"
+
+
+class ChunkedFrameReader:
+    """
+    分塊讀取器類別
+
+    負責逐塊或整體讀取目錄中既有的分塊檔，不會修改任何檔案。
+    """
+
+    def __init__(self, directory):
+        """
+        初始化 ChunkedFrameReader 實例
+
+        :param directory: 分塊檔所在目錄
+        """
+        self.directory = directory
+
+    def chunk_paths(self):
+        """
+        取得依序排列的分塊檔路徑
+
+        :return: 分塊檔路徑列表
+        """
+        return sorted(glob.glob(os.path.join(self.directory, "chunk-*.parquet")))
+
+    @staticmethod
+    def read_chunk(path, columns=None):
+        """
+        讀取單一分塊檔，並將寫入時轉為 JSON 字串的欄位還原為列表或字典
+
+        :param path: 分塊檔路徑
+        :param columns: 要讀取的欄位列表，預設為全部欄位
+        :return: DataFrame
+        """
+        table = pq.read_table(path, columns=columns)
+        df = table.to_pandas()
+        metadata = table.schema.metadata or {}
+        json_columns = json.loads(metadata.get(JSON_COLUMNS_METADATA_KEY, b"[]"))
+        for col in json_columns:
+            if col in df.columns:
+                df[col] = df[col].map(
+                    lambda x: json.loads(x) if isinstance(x, str) else x
+                )
+        return df
+
+    def iter_frames(self, columns=None):
+        """
+        逐塊讀取資料
+
+        :param columns: 要讀取的欄位列表，預設為全部欄位
+        :return: 逐一產生每個分塊的 DataFrame
+        """
+        for path in self.chunk_paths():
+            yield self.read_chunk(path, columns)
+
+    def to_frame(self, columns=None):
+        """
+        將所有分塊組合為單一 DataFrame
+
+        :param columns: 要讀取的欄位列表，預設為全部欄位
+        :return: 組合後的 DataFrame
+        """
+        if not self.chunk_paths():
+            return pd.DataFrame(columns=columns)
+        return pd.concat(self.iter_frames(columns), ignore_index=True)
+
+
+class ChunkedFrameWriter:
+    """
+    分塊寫入器類別
+
+    負責緩衝資料列，並以固定筆數寫出 Parquet 分塊檔。
+    """
+
+    def __init__(self, directory, chunk_size=DEFAULT_CHUNK_SIZE):
+        """
+        初始化 ChunkedFrameWriter 實例，並清除目錄中前一次爬取留下的分塊檔
+
+        :param directory: 分塊檔輸出目錄
+        :param chunk_size: 每個分塊的資料列數量，預設為 DEFAULT_CHUNK_SIZE
+        """
+        self.directory = directory
+        self.chunk_size = chunk_size
+        self.row_count = 0
+        self._buffer = []
+        self._chunk_count = 0
+
+        os.makedirs(directory, exist_ok=True)
+        for path in ChunkedFrameReader(directory).chunk_paths():
+            os.remove(path)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    def append(self, row):
+        """
+        加入一筆資料列，緩衝區滿時寫出分塊檔
+
+        :param row: 資料列字典
+        """
+        self._buffer.append(row)
+        self.row_count += 1
+        if len(self._buffer) >= self.chunk_size:
+            self.flush()
+
+    def flush(self):
+        """
+        將緩衝區中的資料列寫成一個分塊檔並清空緩衝區
+        """
+        if not self._buffer:
+            return
+        df = pd.DataFrame(self._buffer)
+        json_columns = [
+            col
+            for col in df.columns
+            if df[col].dtype == object
+            and df[col].map(lambda x: isinstance(x, (list, dict))).any()
+        ]
+        table = frame_to_table(df)
+        table = table.replace_schema_metadata(
+            {
+                **(table.schema.metadata or {}),
+                JSON_COLUMNS_METADATA_KEY: json.dumps(json_columns),
+            }
+        )
+        path = os.path.join(self.directory, f"chunk-{self._chunk_count:06d}.parquet")
+        pq.write_table(table, path)
+        self._buffer = []
+        self._chunk_count += 1
+
+    def close(self):
+        """
+        寫出剩餘的資料列
+
+        :return: 可讀取已寫出分塊的 ChunkedFrameReader
+        """
+        self.flush()
+        logger.info(
+            f"已寫入 {self.row_count} 筆資料，共 {self._chunk_count} 個分塊到 {self.directory}"
+        )
+        return ChunkedFrameReader(self.directory)
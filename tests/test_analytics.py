@@ -0,0 +1,75 @@
+import pandas as pd
+
+from analytics import MarketRollups
+
+
+def make_jobs(job_ids, salaries, salary_description="月薪"):
+    return pd.DataFrame(
+        {
+            "job_id": job_ids,
+            "company_address": "台北市信義區",
+            "experience_required": "1年以上",
+            "required_education": "大學",
+            "salary_description": salary_description,
+            "salary_low": salaries,
+            "salary_high": salaries,
+        }
+    )
+
+
+def make_details(job_ids, industry="軟體及網路相關業"):
+    return pd.DataFrame(
+        {
+            "job_id": job_ids,
+            "industry": industry,
+            "required_skills": "Python, SQL",
+            "welfare_tags": "年終獎金, 年終獎金, 員工旅遊",
+        }
+    )
+
+
+def test_salary_percentiles_from_histogram_bin_midpoints(tmp_path):
+    rollups = MarketRollups(tmp_path)
+    rollups.update(make_jobs(["a", "b", "c", "d"], [30000, 40000, 50000, 60000]))
+
+    percentiles = rollups.salary_percentiles("area").loc["台北市"]
+    assert percentiles.to_dict() == {
+        "count": 4,
+        "p25": 30500,
+        "p50": 40500,
+        "p75": 50500,
+    }
+
+
+def test_hourly_and_annual_salaries_are_kept_apart(tmp_path):
+    rollups = MarketRollups(tmp_path)
+    rollups.update(make_jobs(["a"], [40000]))
+    rollups.update(make_jobs(["b"], [183], "時薪183元"))
+    rollups.update(make_jobs(["c"], [1000000], "年薪1,000,000元"))
+
+    monthly = rollups.salary_percentiles("area")
+    hourly = rollups.salary_percentiles("area", salary_unit="時薪")
+    assert monthly.loc["台北市", "count"] == 1
+    assert hourly.loc["台北市", "p50"] == 185
+
+
+def test_recrawled_jobs_are_counted_once(tmp_path):
+    rollups = MarketRollups(tmp_path)
+    jobs = make_jobs(["a", "b"], [40000, 50000])
+    details = make_details(["a", "b"])
+    assert rollups.update(jobs, details) == (2, 2)
+    assert MarketRollups(tmp_path).update(jobs, details) == (0, 0)
+
+    reloaded = MarketRollups(tmp_path)
+    assert reloaded.posting_counts("area").to_dict() == {"台北市": 2}
+    assert reloaded.skill_frequency().to_dict() == {"Python": 2, "SQL": 2}
+    assert reloaded.welfare_prevalence().to_dict() == {"年終獎金": 1.0, "員工旅遊": 1.0}
+
+
+def test_industry_attributed_when_details_arrive_later(tmp_path):
+    rollups = MarketRollups(tmp_path)
+    rollups.update(make_jobs(["a"], [40000]))
+    rollups.update(make_jobs(["a"], [40000]), make_details(["a"]))
+
+    assert rollups.posting_counts("industry").to_dict() == {"軟體及網路相關業": 1}
+    assert rollups.salary_percentiles("industry")["count"].tolist() == [1]
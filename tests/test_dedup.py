@@ -0,0 +1,54 @@
+import os
+
+import pytest
+
+from dedup import JobDeduplicator
+
+DESCRIPTION = (
+    "負責開發與維護公司內部的資料平台，使用 Python 撰寫 ETL 流程，"
+    "並與資料科學團隊合作建置機器學習模型的資料管線。熟悉 SQL 與雲端服務者佳。"
+)
+OTHER_DESCRIPTION = (
+    "門市銷售人員，負責商品陳列、顧客服務與收銀作業，"
+    "需配合輪班並協助盤點庫存，具零售業經驗者優先錄取。"
+)
+
+
+def test_near_duplicates_share_cluster_with_earliest_job():
+    deduplicator = JobDeduplicator()
+    deduplicator.add("a", f"資料工程師 甲公司 {DESCRIPTION}")
+    deduplicator.add("b", f"資料工程師 甲公司 {DESCRIPTION}！")
+    deduplicator.add("c", f"門市人員 乙公司 {OTHER_DESCRIPTION}")
+
+    assert deduplicator.cluster_ids(["a", "b", "c"]) == ["a", "a", "c"]
+
+
+def test_short_texts_and_unknown_jobs_keep_their_own_id():
+    deduplicator = JobDeduplicator()
+    deduplicator.add("a", "ab")
+    deduplicator.add("b", "ab")
+
+    assert deduplicator.cluster_ids(["a", "b", "unknown"]) == ["a", "b", "unknown"]
+
+
+def test_clusters_survive_save_and_load(tmp_path):
+    path = tmp_path / "index.pkl"
+    deduplicator = JobDeduplicator()
+    for i in range(3):
+        deduplicator.add(
+            f"job{i}", f"職缺{i} {OTHER_DESCRIPTION if i else DESCRIPTION}"
+        )
+    deduplicator.save(path)
+
+    loaded = JobDeduplicator.load_or_create(path)
+    assert os.listdir(tmp_path) == ["index.pkl"]
+    assert len(loaded) == 3
+    assert loaded.add("copy", f"職缺1 {OTHER_DESCRIPTION}") == "job1"
+
+
+def test_load_rejects_mismatched_signature_parameters(tmp_path):
+    path = tmp_path / "index.pkl"
+    JobDeduplicator(seed=1).save(path)
+
+    with pytest.raises(ValueError):
+        JobDeduplicator.load_or_create(path, seed=2)